@@ -0,0 +1,303 @@
+"""
+Data cleaning and imputation stage for the raw sensor history.
+
+Productized version of the model processing notebook
+(`TemperatureNegativeReplacer` + KNN imputation + label standardization)
+that scales to millions of rows:
+
+- the CSV is read in chunks and never fully loaded in memory
+- the imputer is fitted on a bounded reservoir sample of complete rows and
+  answers neighbour queries with a KD-tree, O(n log m) instead of O(n²)
+- failure labels are standardized with vectorized lookups
+- the output is written to Parquet, keyed by the source file and the
+  cleaning parameters, so training and bulk scoring can reuse it
+
+Usage (from the api/ folder):
+    python -m app.pipelines.cleaning --input bootcamp_train.csv --output processed_df.parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.neighbors import KDTree
+
+from app.utils.features import LABELS, NUMERIC_FEATURES, TEMPERATURE_COLUMNS, sensor_range_ok
+
+RENAME_COLUMNS = {
+    "FDF (Falha Desgaste Ferramenta)": "fdf",
+    "FDC (Falha Dissipacao Calor)": "fdc",
+    "FP (Falha Potencia)": "fp",
+    "FTE (Falha Tensao Excessiva)": "fte",
+    "FA (Falha Aleatoria)": "fa",
+}
+FAILURE_COLUMNS = ["falha_maquina", *LABELS]
+
+# Raw label spellings found in the dataset, mapped straight to 0/1.
+# Anything else (including missing values) is treated as 0, like the notebook.
+LABEL_MAP: Dict[str, int] = {
+    "não": 0, "Não": 0, "nao": 0, "N": 0, "False": 0, "0": 0, "0.0": 0,
+    "sim": 1, "Sim": 1, "S": 1, "y": 1, "Y": 1, "True": 1, "1": 1, "1.0": 1,
+}
+
+CACHE_KEY_METADATA = b"cleaning_cache_key"
+
+
+def standardize_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename the failure columns and map their values to 0/1."""
+    df = df.rename(columns=RENAME_COLUMNS)
+    df.columns = [col.lower() for col in df.columns]
+
+    for col in FAILURE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().map(LABEL_MAP).fillna(0).astype(np.int8)
+
+    present = [col for col in LABELS if col in df.columns]
+    if present:
+        df["numero_de_falhas"] = df[present].sum(axis=1).astype(np.int8)
+    return df
+
+
+class TemperatureNegativeReplacer(BaseEstimator, TransformerMixin):
+    """Replaces negative temperatures with NaN."""
+
+    def __init__(self, temperature_columns=None):
+        self.temperature_columns = temperature_columns
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        X = X.copy()
+        cols = [col for col in (self.temperature_columns or TEMPERATURE_COLUMNS) if col in X.columns]
+        X[cols] = X[cols].mask(X[cols] < 0)
+        return X
+
+
+class SensorValidityChecker(BaseEstimator, TransformerMixin):
+    """
+    Adds the `sensor_ok` flag: no missing sensor values, the fixed rules of
+    `sensor_range_ok` (Kelvin ranges, shared with the API) and no outliers.
+    Outliers (|z| > 4) are measured against the statistics of the data seen
+    in `fit`, so every chunk is judged the same way.
+
+    The notebook used Celsius ranges, which flagged every row as invalid, so
+    the shipped binary model saw a constant `sensor_ok`.
+    """
+
+    def __init__(self, sensor_columns=None, temp_ranges=None, z_threshold: float = 4.0):
+        self.sensor_columns = sensor_columns
+        self.temp_ranges = temp_ranges
+        self.z_threshold = z_threshold
+
+    def fit(self, X, y=None):
+        cols = self.sensor_columns or NUMERIC_FEATURES
+        self.mean_ = X[cols].mean()
+        self.std_ = X[cols].std().replace(0, np.nan)
+        return self
+
+    def transform(self, X):
+        X = X.copy()
+        cols = self.sensor_columns or NUMERIC_FEATURES
+        ok = X[cols].notna().all(axis=1) & sensor_range_ok(X, self.temp_ranges)
+
+        z_scores = ((X[cols] - self.mean_) / self.std_).abs()
+        ok &= ~(z_scores > self.z_threshold).any(axis=1)
+
+        X["sensor_ok"] = ok
+        return X
+
+
+class KDTreeKNNImputer(BaseEstimator, TransformerMixin):
+    """
+    KNN imputation against a fixed reference sample.
+
+    Columns are standardized with the reference statistics and, for every
+    missing-value pattern, a KD-tree is built over the observed columns of the
+    reference rows. Missing values are filled with the mean of the
+    `n_neighbors` nearest reference rows.
+    """
+
+    def __init__(self, columns=None, n_neighbors: int = 5, leaf_size: int = 40):
+        self.columns = columns
+        self.n_neighbors = n_neighbors
+        self.leaf_size = leaf_size
+
+    def fit(self, X, y=None):
+        cols = self.columns or NUMERIC_FEATURES
+        reference = X[cols].dropna().to_numpy(dtype=float)
+        if len(reference) == 0:
+            raise ValueError("Reference sample has no complete rows")
+
+        self.mean_ = reference.mean(axis=0)
+        self.scale_ = reference.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1.0
+        self.reference_ = reference
+        self._trees: Dict[tuple, KDTree] = {}
+        return self
+
+    def _tree_for(self, observed: tuple) -> KDTree:
+        # One tree per missing-value pattern, built lazily and reused across chunks
+        if observed not in self._trees:
+            cols = list(observed)
+            scaled = (self.reference_[:, cols] - self.mean_[cols]) / self.scale_[cols]
+            self._trees[observed] = KDTree(scaled, leaf_size=self.leaf_size)
+        return self._trees[observed]
+
+    def transform(self, X):
+        X = X.copy()
+        cols = self.columns or NUMERIC_FEATURES
+        values = X[cols].to_numpy(dtype=float)
+        missing = np.isnan(values)
+        rows_to_fill = missing.any(axis=1)
+        if not rows_to_fill.any():
+            # Always float64, so every chunk has the same Parquet schema
+            X[cols] = values
+            return X
+
+        k = min(self.n_neighbors, len(self.reference_))
+        patterns, inverse = np.unique(missing[rows_to_fill], axis=0, return_inverse=True)
+        row_idx = np.flatnonzero(rows_to_fill)
+
+        for p, pattern in enumerate(patterns):
+            rows = row_idx[inverse.ravel() == p]
+            observed = tuple(np.flatnonzero(~pattern))
+            missing_cols = np.flatnonzero(pattern)
+
+            if observed:
+                query = (values[np.ix_(rows, observed)] - self.mean_[list(observed)]) / self.scale_[list(observed)]
+                _, neighbours = self._tree_for(observed).query(query, k=k)
+                filled = self.reference_[neighbours][:, :, missing_cols].mean(axis=1)
+            else:
+                # Nothing observed: fall back to the reference mean
+                filled = np.broadcast_to(self.mean_[missing_cols], (len(rows), len(missing_cols)))
+            values[np.ix_(rows, missing_cols)] = filled
+
+        X[cols] = values
+        return X
+
+
+def read_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Read the raw CSV in chunks, with labels already standardized."""
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield standardize_labels(chunk)
+
+
+def sample_reference(path: str, size: int, chunksize: int, random_state: int = 42) -> pd.DataFrame:
+    """
+    Uniform sample of at most `size` rows in one pass over the CSV (bottom-k
+    sampling on random keys), with negative temperatures already set to NaN.
+    Memory stays O(size + chunksize).
+    """
+    rng = np.random.default_rng(random_state)
+    replacer = TemperatureNegativeReplacer()
+    sample = None
+    for chunk in read_chunks(path, chunksize):
+        chunk = replacer.transform(chunk)
+        chunk["_key"] = rng.random(len(chunk))
+        sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+        if len(sample) > size:
+            sample = sample.nsmallest(size, "_key")
+    if sample is None:
+        raise ValueError(f"No rows found in {path}")
+    return sample.drop(columns="_key").reset_index(drop=True)
+
+
+def cache_key(input_path: str, **params) -> str:
+    """Identifies a cleaned output by its source file and cleaning parameters."""
+    stat = os.stat(input_path)
+    payload = json.dumps(
+        {"path": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime, **params},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cached_output_is_valid(output_path: str, key: str) -> bool:
+    if not os.path.exists(output_path):
+        return False
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(output_path).metadata or {}
+    return metadata.get(CACHE_KEY_METADATA, b"").decode() == key
+
+
+def run_cleaning(input_path: str, output_path: str, chunksize: int = 100_000,
+                 reference_size: int = 50_000, n_neighbors: int = 5,
+                 random_state: int = 42, force: bool = False) -> str:
+    """
+    Clean and impute `input_path` chunk by chunk and write `output_path` (Parquet).
+    Returns the output path; an up-to-date cached output is reused unless `force`.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    key = cache_key(input_path, reference_size=reference_size, n_neighbors=n_neighbors,
+                    random_state=random_state)
+    if not force and _cached_output_is_valid(output_path, key):
+        logger.info(f"Reusing cached cleaned data at {output_path}")
+        return output_path
+
+    logger.info(f"Sampling up to {reference_size} reference rows from {input_path}")
+    reference = sample_reference(input_path, reference_size, chunksize, random_state)
+    validator = SensorValidityChecker().fit(reference)
+    imputer = KDTreeKNNImputer(n_neighbors=n_neighbors).fit(reference)
+    replacer = TemperatureNegativeReplacer()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    writer: Optional[pq.ParquetWriter] = None
+    total_rows = 0
+    try:
+        for chunk in read_chunks(input_path, chunksize):
+            # Validity is checked before negative temperatures are removed
+            chunk = validator.transform(chunk)
+            chunk = imputer.transform(replacer.transform(chunk))
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema.with_metadata({**(table.schema.metadata or {}), CACHE_KEY_METADATA: key.encode()})
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table.cast(writer.schema))
+            total_rows += len(chunk)
+            logger.info(f"Cleaned {total_rows} rows")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    os.replace(tmp_path, output_path)
+    logger.info(f"Cleaned data saved to {output_path} ({total_rows} rows)")
+    return output_path
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Clean and impute the raw sensor history")
+    parser.add_argument("--input", required=True, help="Raw CSV (e.g. bootcamp_train.csv)")
+    parser.add_argument("--output", default="processed_df.parquet", help="Cleaned Parquet file")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk")
+    parser.add_argument("--reference-size", type=int, default=50_000,
+                        help="Rows sampled as the imputer reference set")
+    parser.add_argument("--n-neighbors", type=int, default=5)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Ignore a cached output")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> str:
+    args = parse_args(argv)
+    return run_cleaning(
+        args.input, args.output, chunksize=args.chunksize, reference_size=args.reference_size,
+        n_neighbors=args.n_neighbors, random_state=args.random_state, force=args.force,
+    )
+
+
+if __name__ == "__main__":
+    main()
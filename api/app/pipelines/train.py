@@ -0,0 +1,572 @@
+"""
+Training pipeline for the predictive maintenance models.
+
+Reproduces the artifacts built by hand in the multilabel and binary
+classification notebooks:
+
+- `pipeline_multilabel.pkl`: preprocessor + tuned MultiOutputClassifier
+- `xgboost_undersample_pipeline.pkl`: dict with the binary XGBoost pipeline,
+  undersampler, optimized threshold and metrics
+
+Cross-validation folds and Optuna trials run in parallel, and the
+preprocessed (and MLSMOTE-resampled) fold matrices are cached on disk with
+joblib.Memory, so every model and every trial reuses the same fold data
+instead of refitting the preprocessor.
+
+Usage (from the api/ folder):
+    python -m app.pipelines.train --data processed_df.parquet --output-dir ml_models
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed, parallel_config
+from loguru import logger
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import (
+    AdaBoostClassifier,
+    GradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (
+    accuracy_score,
+    f1_score,
+    jaccard_score,
+    precision_recall_curve,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.neighbors import NearestNeighbors
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, OneHotEncoder
+from sklearn.tree import DecisionTreeClassifier
+from xgboost import XGBClassifier
+
+from app.services.drift_monitor import REFERENCE_PROFILE_FILE, build_reference_profile
+from app.utils.custom_transformers import DropColumns, OneHotEncoding, ScaleFeatures
+from app.utils.features import BINARY_FEATURES, CATEGORICAL_FEATURES, DROP_COLUMNS, LABELS, NUMERIC_FEATURES
+
+try:
+    from iterstrat.ml_stratifiers import MultilabelStratifiedKFold
+except ImportError:  # pragma: no cover - optional training dependency
+    MultilabelStratifiedKFold = None
+
+try:
+    from catboost import CatBoostClassifier
+except ImportError:  # pragma: no cover - optional training dependency
+    CatBoostClassifier = None
+
+
+MULTILABEL_ARTIFACT = "pipeline_multilabel.pkl"
+BINARY_ARTIFACT = "xgboost_undersample_pipeline.pkl"
+REPORT_FILE = "training_report.json"
+
+# Rows per failure label after MLSMOTE oversampling
+SMOTE_TARGET_SIZE = 500
+
+# Optuna search spaces (same as the multilabel notebook).
+# Lists are categorical choices, tuples are numeric ranges.
+PARAM_GRIDS: Dict[str, dict] = {
+    "logistic_regression": {
+        "C": (0.0001, 10.0),
+        "solver": ["lbfgs", "saga", "liblinear"],
+        "max_iter": (100, 500),
+    },
+    "decision_tree": {
+        "criterion": ["gini", "entropy"],
+        "max_depth": (5, 30),
+        "min_samples_split": (2, 10),
+        "min_samples_leaf": (1, 5),
+        "max_features": ["sqrt", None],
+    },
+    "random_forest": {
+        "n_estimators": (50, 200),
+        "max_depth": (5, 30),
+        "min_samples_split": (2, 10),
+        "min_samples_leaf": (1, 5),
+        "max_features": ["sqrt", "log2", None],
+        "bootstrap": [True, False],
+    },
+    "gradient_boosting": {
+        "n_estimators": (50, 200),
+        "learning_rate": (0.01, 0.2),
+        "max_depth": (3, 10),
+        "min_samples_split": (2, 10),
+        "min_samples_leaf": (1, 5),
+        "subsample": (0.8, 1.0),
+        "max_features": ["sqrt", "log2", None],
+    },
+    "adaboost": {
+        "n_estimators": (50, 200),
+        "learning_rate": (0.01, 1.0),
+    },
+    "xgboost": {
+        "n_estimators": (50, 200),
+        "learning_rate": (0.01, 0.3),
+        "max_depth": (3, 10),
+        "min_child_weight": (1, 5),
+        "subsample": (0.8, 1.0),
+        "colsample_bytree": (0.8, 1.0),
+        "gamma": (0.0, 0.2),
+    },
+    "catboost": {
+        "iterations": (100, 300),
+        "learning_rate": (0.01, 0.3),
+        "depth": (4, 10),
+        "l2_leaf_reg": (1.0, 10.0),
+        "border_count": (32, 128),
+    },
+}
+
+
+class PhaseTimer:
+    """Collects wall-clock time per training phase."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        logger.info(f"[{name}] started")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 3)
+            logger.info(f"[{name}] finished in {elapsed:.2f}s")
+
+
+def load_processed_data(path: str) -> pd.DataFrame:
+    """Load the output of the model processing stage (CSV or Parquet)."""
+    if path.endswith(".parquet") or os.path.isdir(path):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    failure_columns = ["falha_maquina", *LABELS]
+    for col in failure_columns:
+        if col in df.columns:
+            df[col] = df[col].astype(int)
+    return df
+
+
+def build_multilabel_preprocessor() -> Pipeline:
+    """Same preprocessing steps as the multilabel notebook."""
+    return Pipeline([
+        ("drop_columns", DropColumns(columns_to_drop=DROP_COLUMNS)),
+        ("label_encoding", OneHotEncoding(columns=CATEGORICAL_FEATURES)),
+        ("scale_features", ScaleFeatures(columns_to_scale=NUMERIC_FEATURES)),
+    ])
+
+
+def build_binary_preprocessor(numeric_features: List[str], categorical_features: List[str]) -> ColumnTransformer:
+    """Same preprocessing steps as the binary classification notebook."""
+    return ColumnTransformer(
+        transformers=[
+            ("num", MinMaxScaler(), numeric_features),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
+        ],
+        remainder="passthrough",
+    )
+
+
+def get_multilabel_models(random_state: int = 42) -> Dict[str, MultiOutputClassifier]:
+    """Candidate models wrapped in MultiOutputClassifier."""
+    models = {
+        "logistic_regression": MultiOutputClassifier(LogisticRegression(random_state=random_state)),
+        "decision_tree": MultiOutputClassifier(DecisionTreeClassifier(random_state=random_state)),
+        "random_forest": MultiOutputClassifier(RandomForestClassifier(random_state=random_state)),
+        "gradient_boosting": MultiOutputClassifier(GradientBoostingClassifier(random_state=random_state)),
+        "adaboost": MultiOutputClassifier(AdaBoostClassifier(algorithm="SAMME", random_state=random_state)),
+        "xgboost": MultiOutputClassifier(XGBClassifier(random_state=random_state, eval_metric="logloss")),
+    }
+    if CatBoostClassifier is not None:
+        models["catboost"] = MultiOutputClassifier(CatBoostClassifier(random_state=random_state, verbose=0))
+    return models
+
+
+def mlsmote(X: np.ndarray, y: np.ndarray, target_size: int = SMOTE_TARGET_SIZE, k: int = 2,
+            random_state: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    MLSMOTE oversampling: for each label, interpolate minority samples with
+    their nearest neighbours until the label reaches `target_size` rows.
+    Synthetic labels are the OR of both parents' labels.
+    """
+    rng = np.random.default_rng(random_state)
+    synthetic_X, synthetic_y = [], []
+
+    for label_idx in range(y.shape[1]):
+        label_indices = np.where(y[:, label_idx] == 1)[0]
+        n_needed = target_size - len(label_indices)
+        if len(label_indices) < 2 or n_needed <= 0:
+            continue
+
+        X_min = X[label_indices]
+        y_min = y[label_indices]
+        knn = NearestNeighbors(n_neighbors=min(k, len(label_indices)))
+        knn.fit(X_min)
+        nn_array = knn.kneighbors(X_min, return_distance=False)[:, 1:]
+
+        # Vectorized sample generation
+        idx = rng.integers(0, len(X_min), size=n_needed)
+        nn = nn_array[idx, rng.integers(0, nn_array.shape[1], size=n_needed)]
+        gap = rng.random((n_needed, 1))
+        synthetic_X.append(X_min[idx] + gap * (X_min[nn] - X_min[idx]))
+        synthetic_y.append(np.logical_or(y_min[idx], y_min[nn]).astype(int))
+
+    if not synthetic_X:
+        return X, y
+    return np.vstack([X, *synthetic_X]), np.vstack([y, *synthetic_y])
+
+
+def _resample(X_processed: pd.DataFrame, y: np.ndarray, smote_target_size: int,
+              random_state: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply MLSMOTE to preprocessed features, keeping the one-hot columns binary."""
+    X_res, y_res = mlsmote(X_processed.to_numpy(dtype=float), y,
+                           target_size=smote_target_size, random_state=random_state)
+    onehot_idx = [i for i, col in enumerate(X_processed.columns) if col.startswith("tipo_")]
+    if onehot_idx:
+        X_res[:, onehot_idx] = (X_res[:, onehot_idx] >= 0.5).astype(float)
+    return X_res, y_res
+
+
+def _prepare_fold(X: pd.DataFrame, y: pd.DataFrame, train_idx: np.ndarray, test_idx: np.ndarray,
+                  smote_target_size: int, random_state: int):
+    """Fit the preprocessor on the train fold and resample it (cached on disk)."""
+    preprocessor = build_multilabel_preprocessor()
+    X_train = preprocessor.fit_transform(X.iloc[train_idx])
+    X_test = preprocessor.transform(X.iloc[test_idx])
+    X_res, y_res = _resample(X_train, y.iloc[train_idx].to_numpy(), smote_target_size, random_state)
+    return X_res, y_res, X_test.to_numpy(dtype=float), y.iloc[test_idx].to_numpy()
+
+
+def _multilabel_splitter(n_splits: int, random_state: int):
+    if MultilabelStratifiedKFold is None:
+        logger.warning("iterative-stratification not installed, falling back to KFold")
+        return KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return MultilabelStratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+
+
+def build_folds(X: pd.DataFrame, y: pd.DataFrame, n_splits: int, memory: Memory,
+                smote_target_size: int = SMOTE_TARGET_SIZE, random_state: int = 42, n_jobs: int = -1) -> list:
+    """Preprocess every CV fold once, in parallel, going through the disk cache."""
+    splitter = _multilabel_splitter(n_splits, random_state)
+    prepare = memory.cache(_prepare_fold)
+    return Parallel(n_jobs=n_jobs)(
+        delayed(prepare)(X, y, train_idx, test_idx, smote_target_size, random_state)
+        for train_idx, test_idx in splitter.split(X, y)
+    )
+
+
+def _score_fold(name: str, model, fold, average: str = "micro") -> Tuple[str, float]:
+    X_train, y_train, X_test, y_test = fold
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return name, f1_score(y_test, y_pred, average=average, zero_division=0)
+
+
+def cross_validate_models(models: Dict[str, MultiOutputClassifier], folds: list,
+                          n_jobs: int = -1) -> Dict[str, dict]:
+    """
+    Score every (model, fold) pair in parallel using the cached fold matrices.
+    Models are compared on F1-micro, as in the notebook's model selection.
+    """
+    with parallel_config(backend="loky", inner_max_num_threads=1):
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_score_fold)(name, clone(model), fold)
+            for name, model in models.items()
+            for fold in folds
+        )
+
+    results: Dict[str, dict] = {}
+    for name, score in scores:
+        results.setdefault(name, {"individual_scores": []})["individual_scores"].append(round(score, 4))
+    for name, result in results.items():
+        result["average_score"] = round(float(np.mean(result["individual_scores"])), 4)
+        logger.info(f"{name}: average F1-micro = {result['average_score']:.4f}")
+    return results
+
+
+def _suggest_params(trial, param_grid: dict) -> dict:
+    params = {}
+    for key, value in param_grid.items():
+        if isinstance(value, list):
+            params[key] = trial.suggest_categorical(key, value)
+        elif isinstance(value[0], int) and isinstance(value[1], int):
+            params[key] = trial.suggest_int(key, value[0], value[1])
+        else:
+            params[key] = trial.suggest_float(key, value[0], value[1])
+    return params
+
+
+def tune_model(model: MultiOutputClassifier, param_grid: dict, folds: list, n_trials: int = 50,
+               n_jobs: int = -1, timeout: Optional[float] = None, random_state: int = 42) -> dict:
+    """
+    Optuna search over the cached folds. Trials run concurrently and report
+    the running mean score after each fold, so the MedianPruner stops
+    unpromising trials early.
+    """
+    import optuna
+
+    def objective(trial):
+        params = _suggest_params(trial, param_grid)
+        candidate = clone(model).set_params(**{f"estimator__{k}": v for k, v in params.items()})
+        if n_jobs != 1 and "n_jobs" in candidate.estimator.get_params():
+            # Trials already run concurrently, avoid oversubscribing the cores
+            candidate.set_params(estimator__n_jobs=1)
+
+        scores = []
+        for step, fold in enumerate(folds):
+            # The notebook tunes the chosen model on F1-macro
+            scores.append(_score_fold("", candidate, fold, average="macro")[1])
+            trial.report(float(np.mean(scores)), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return float(np.mean(scores))
+
+    study = optuna.create_study(
+        direction="maximize",
+        sampler=optuna.samplers.TPESampler(seed=random_state),
+        pruner=optuna.pruners.MedianPruner(n_warmup_steps=1),
+    )
+    study.optimize(objective, n_trials=n_trials, n_jobs=n_jobs, timeout=timeout)
+
+    n_pruned = sum(t.state == optuna.trial.TrialState.PRUNED for t in study.trials)
+    logger.info(f"Best trial score {study.best_value:.4f} ({n_pruned}/{len(study.trials)} trials pruned)")
+    return {"best_params": study.best_params, "best_score": round(study.best_value, 4), "pruned_trials": n_pruned}
+
+
+def _multilabel_metrics(y_true, y_pred) -> dict:
+    metrics = {"accuracy": accuracy_score(y_true, y_pred)}
+    for avg in ["micro", "macro", "weighted"]:
+        metrics[f"precision_{avg}"] = precision_score(y_true, y_pred, average=avg, zero_division=0)
+        metrics[f"recall_{avg}"] = recall_score(y_true, y_pred, average=avg, zero_division=0)
+        metrics[f"f1_{avg}"] = f1_score(y_true, y_pred, average=avg, zero_division=0)
+        metrics[f"jaccard_{avg}"] = jaccard_score(y_true, y_pred, average=avg, zero_division=0)
+    return {k: round(float(v), 4) for k, v in metrics.items()}
+
+
+def train_multilabel(df: pd.DataFrame, output_dir: str, timer: PhaseTimer, memory: Memory,
+                     n_splits: int = 5, n_trials: int = 50, n_jobs: int = -1,
+                     timeout: Optional[float] = None, random_state: int = 42) -> dict:
+    """Cross-validate the candidate models, tune the best one and save `pipeline_multilabel.pkl`."""
+    X = df.drop(columns=["falha_maquina", "numero_de_falhas", "sensor_ok", *LABELS], errors="ignore")
+    y = df[LABELS]
+
+    # Hold out the first stratified fold as test set, like the notebook
+    train_idx, test_idx = next(_multilabel_splitter(5, random_state).split(X, y))
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+
+    with timer.phase("multilabel_fold_preprocessing"):
+        folds = build_folds(X_train, y_train, n_splits, memory, random_state=random_state, n_jobs=n_jobs)
+
+    models = get_multilabel_models(random_state)
+    with timer.phase("multilabel_cross_validation"):
+        cv_results = cross_validate_models(models, folds, n_jobs=n_jobs)
+
+    best_name = max(cv_results, key=lambda name: cv_results[name]["average_score"])
+    logger.info(f"Best base model: {best_name}")
+
+    with timer.phase("multilabel_tuning"):
+        tuning = tune_model(models[best_name], PARAM_GRIDS[best_name], folds, n_trials=n_trials,
+                            n_jobs=n_jobs, timeout=timeout, random_state=random_state)
+
+    with timer.phase("multilabel_final_fit"):
+        preprocessor = build_multilabel_preprocessor()
+        X_train_processed = preprocessor.fit_transform(X_train)
+        X_res, y_res = _resample(X_train_processed, y_train.to_numpy(), SMOTE_TARGET_SIZE, random_state)
+        model = clone(models[best_name]).set_params(
+            **{f"estimator__{k}": v for k, v in tuning["best_params"].items()}
+        )
+        # Fit on a DataFrame so the model keeps the preprocessed feature names
+        model.fit(pd.DataFrame(X_res, columns=X_train_processed.columns), y_res)
+
+    final_pipeline = Pipeline([("preprocessor", preprocessor), ("model", model)])
+    test_metrics = _multilabel_metrics(y_test, final_pipeline.predict(X_test))
+    logger.info(f"Multilabel test F1-macro: {test_metrics['f1_macro']:.4f}")
+
+    artifact_path = os.path.join(output_dir, MULTILABEL_ARTIFACT)
+    with open(artifact_path, "wb") as f:
+        pickle.dump(final_pipeline, f)
+    logger.info(f"Multilabel pipeline saved to {artifact_path}")
+
+    return {
+        "cv_results": cv_results,
+        "best_model": best_name,
+        "tuning": tuning,
+        "test_metrics": test_metrics,
+        "artifact": artifact_path,
+    }
+
+
+def train_binary(df: pd.DataFrame, output_dir: str, timer: PhaseTimer, n_jobs: int = -1,
+                 early_stopping_rounds: Optional[int] = None, random_state: int = 42) -> dict:
+    """
+    Train the undersampled XGBoost model and save `xgboost_undersample_pipeline.pkl`.
+    By default this matches the notebook (100 trees on the whole undersampled
+    training set); `early_stopping_rounds` is opt-in.
+    """
+    from imblearn.under_sampling import RandomUnderSampler
+
+    df_binary = df[[*BINARY_FEATURES, "falha_maquina"]].copy()
+    label_encoder = LabelEncoder()
+    y = pd.Series(label_encoder.fit_transform(df_binary["falha_maquina"]), index=df_binary.index)
+    df_binary["sensor_ok"] = label_encoder.fit_transform(df_binary["sensor_ok"])
+    X = df_binary[BINARY_FEATURES]
+
+    numeric_features = X.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_features = X.select_dtypes(exclude=[np.number]).columns.tolist()
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=random_state, stratify=y
+    )
+
+    with timer.phase("binary_preprocessing"):
+        preprocessor = build_binary_preprocessor(numeric_features, categorical_features)
+        X_train_processed = preprocessor.fit_transform(X_train)
+        X_test_processed = preprocessor.transform(X_test)
+
+        X_val = y_val = None
+        if early_stopping_rounds:
+            # Validation rows come from the training split before undersampling,
+            # so they keep the real class ratio
+            X_train_processed, X_val, y_train, y_val = train_test_split(
+                X_train_processed, y_train, test_size=0.1,
+                random_state=random_state, stratify=y_train,
+            )
+
+        # Undersample the majority class to a 90:10 ratio
+        n_minority = int((y_train == 1).sum())
+        undersampler = RandomUnderSampler(
+            sampling_strategy={0: n_minority * 9, 1: n_minority}, random_state=random_state
+        )
+        X_train_final, y_train_final = undersampler.fit_resample(X_train_processed, y_train)
+
+    with timer.phase("binary_fit"):
+        params = dict(learning_rate=0.1, max_depth=6, eval_metric="logloss",
+                      random_state=random_state, n_jobs=n_jobs)
+        if early_stopping_rounds:
+            model = XGBClassifier(n_estimators=500, early_stopping_rounds=early_stopping_rounds, **params)
+            model.fit(X_train_final, y_train_final, eval_set=[(X_val, y_val)], verbose=False)
+            logger.info(f"Early stopping at iteration {model.best_iteration}")
+        else:
+            model = XGBClassifier(n_estimators=100, **params)
+            model.fit(X_train_final, y_train_final)
+
+    with timer.phase("binary_evaluation"):
+        y_proba = model.predict_proba(X_test_processed)[:, 1]
+        precision_curve, recall_curve, thresholds = precision_recall_curve(y_test, y_proba)
+        f1_scores = np.nan_to_num(2 * precision_curve * recall_curve / (precision_curve + recall_curve))
+        best_idx = int(np.argmax(f1_scores[:-1]))
+        best_threshold = float(thresholds[best_idx])
+
+        y_pred = (y_proba >= best_threshold).astype(int)
+        metrics = {
+            "f1_score": round(f1_score(y_test, y_pred), 4),
+            "precision": round(precision_score(y_test, y_pred, zero_division=0), 4),
+            "recall": round(recall_score(y_test, y_pred, zero_division=0), 4),
+            "auc_roc": round(roc_auc_score(y_test, y_proba), 4),
+        }
+        logger.info(f"Binary test metrics (threshold={best_threshold:.4f}): {metrics}")
+
+    model_artifacts = {
+        "pipeline": Pipeline([("preprocessor", preprocessor), ("classifier", model)]),
+        "undersampler": undersampler,  # Part of training only, not of the pipeline
+        "threshold": best_threshold,
+        "label_encoder": label_encoder,
+        "feature_names": list(X.columns),
+        "model_type": "XGBoost_Undersampling_90_10",
+        "performance_metrics": metrics,
+    }
+    artifact_path = os.path.join(output_dir, BINARY_ARTIFACT)
+    joblib.dump(model_artifacts, artifact_path)
+    logger.info(f"Binary pipeline saved to {artifact_path}")
+
+    return {
+        "threshold": best_threshold,
+        "best_iteration": getattr(model, "best_iteration", None) if early_stopping_rounds else None,
+        "test_metrics": metrics,
+        "artifact": artifact_path,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train the predictive maintenance models")
+    parser.add_argument("--data", required=True, help="Processed dataset (CSV or Parquet)")
+    parser.add_argument("--output-dir", default="ml_models", help="Where to write the .pkl artifacts")
+    parser.add_argument("--target", choices=["all", "multilabel", "binary", "profile"], default="all",
+                        help="'profile' only writes the drift reference profile, without training")
+    parser.add_argument("--cache-dir", default=".train_cache",
+                        help="joblib.Memory location for fold matrices ('' disables caching)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel workers for folds and trials")
+    parser.add_argument("--cv-splits", type=int, default=5)
+    parser.add_argument("--n-trials", type=int, default=50, help="Optuna trials")
+    parser.add_argument("--timeout", type=float, default=None, help="Optuna time budget in seconds")
+    parser.add_argument("--early-stopping-rounds", type=int, default=0,
+                        help="Opt-in XGBoost early stopping for the binary model (0 = notebook setup, 100 trees)")
+    parser.add_argument("--profile-file", default=REFERENCE_PROFILE_FILE,
+                        help="Reference profile file name, must match the API's DRIFT_REFERENCE_FILE")
+    parser.add_argument("--random-state", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    memory = Memory(location=args.cache_dir or None, verbose=0)
+    timer = PhaseTimer()
+    report: dict = {}
+
+    with timer.phase("load_data"):
+        df = load_processed_data(args.data)
+    logger.info(f"Loaded {len(df)} rows from {args.data}")
+
+    with timer.phase("reference_profile"):
+        # Training distribution used by the API drift monitor (/models/drift)
+        profile = build_reference_profile(df, NUMERIC_FEATURES)
+        profile_path = os.path.join(args.output_dir, args.profile_file)
+        with open(profile_path, "w") as f:
+            json.dump(profile, f, indent=2)
+    if args.target == "profile":
+        logger.info(f"Reference profile saved to {profile_path}")
+        return {"timings": timer.timings}
+
+    if args.target in ("all", "multilabel"):
+        report["multilabel"] = train_multilabel(
+            df, args.output_dir, timer, memory, n_splits=args.cv_splits, n_trials=args.n_trials,
+            n_jobs=args.n_jobs, timeout=args.timeout, random_state=args.random_state,
+        )
+    if args.target in ("all", "binary"):
+        report["binary"] = train_binary(
+            df, args.output_dir, timer, n_jobs=args.n_jobs,
+            early_stopping_rounds=args.early_stopping_rounds, random_state=args.random_state,
+        )
+
+    report["timings"] = timer.timings
+    for name, seconds in timer.timings.items():
+        logger.info(f"{name:<32} {seconds:>10.2f}s")
+
+    with open(os.path.join(args.output_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=4, default=str)
+    return report
+
+
+if __name__ == "__main__":
+    main()
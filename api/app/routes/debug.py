@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+from typing import Optional
+import secrets
+
+from app.utils.config import settings
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Only requests carrying PROFILING_ADMIN_TOKEN may use the debug endpoints"""
+    if not settings.PROFILING_ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(
+        x_admin_token, settings.PROFILING_ADMIN_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def _profiler(request: Request):
+    profiler = getattr(request.app.state, "profiler", None)
+    if profiler is None:
+        raise HTTPException(status_code=503, detail="Profiling not enabled")
+    return profiler
+
+
+def _finished_session(request: Request):
+    session = _profiler(request).session
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profile captured yet")
+    if session.running:
+        raise HTTPException(status_code=409, detail="Profile still running")
+    return session
+
+
+@router.post("/profile", dependencies=[Depends(require_admin)])
+async def start_profile(
+    request: Request,
+    duration_s: float = Query(30.0, gt=0, description="Janela máxima de captura, em segundos"),
+    max_requests: Optional[int] = Query(None, ge=1, description="Encerra após N requisições de inferência"),
+    deterministic: bool = Query(False, description="Também gera o pstats (cProfile) de cada job (~4x mais lento)"),
+    trace_allocations: bool = Query(False, description="Rastreia alocações com tracemalloc (~4x mais lento)"),
+):
+    """
+    Inicia uma sessão de profiling do caminho de predição. Por padrão só amostra a CPU
+    das threads de inferência; cProfile e tracemalloc são opcionais e não podem ser combinados.
+    """
+    profiler = _profiler(request)
+    try:
+        session = profiler.start(
+            duration_s, max_requests=max_requests, deterministic=deterministic, trace_allocations=trace_allocations
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return session.summary()
+
+
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile_status(request: Request):
+    session = _profiler(request).session
+    return session.summary() if session else {}
+
+
+@router.post("/profile/stop", dependencies=[Depends(require_admin)])
+async def stop_profile(request: Request):
+    profiler = _profiler(request)
+    profiler.stop()
+    return {"stopping": profiler.active is not None}
+
+
+@router.get("/profile/flamegraph", dependencies=[Depends(require_admin)])
+async def profile_flamegraph(request: Request):
+    """Stacks amostrados no formato collapsed (flamegraph.pl, speedscope, inferno)"""
+    session = _finished_session(request)
+    return PlainTextResponse(
+        session.collapsed_stacks(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{session.id}.folded"'},
+    )
+
+
+@router.get("/profile/pstats", dependencies=[Depends(require_admin)])
+async def profile_pstats(request: Request):
+    """Arquivo pstats (snakeviz, python -m pstats)"""
+    session = _finished_session(request)
+    if not session.deterministic:
+        raise HTTPException(status_code=404, detail="Profile captured without deterministic=true")
+    return Response(
+        session.pstats_bytes(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{session.id}.pstats"'},
+    )
+
+
+@router.get("/profile/allocations", dependencies=[Depends(require_admin)])
+async def profile_allocations(request: Request):
+    """Crescimento de memória (tracemalloc) entre o início e o fim da janela"""
+    session = _finished_session(request)
+    if not session.trace_allocations:
+        raise HTTPException(status_code=404, detail="Profile captured without trace_allocations=true")
+    if session.allocations is None:
+        raise HTTPException(status_code=500, detail="Allocation snapshot not available")
+    return PlainTextResponse(
+        session.allocations,
+        headers={"Content-Disposition": f'attachment; filename="allocations-{session.id}.txt"'},
+    )
@@ -9,12 +9,14 @@ _start_time = time.time()
 @router.get("/")
 async def health_root(request: Request):
     ms = getattr(request.app.state, "model_service", None)
+    pl = getattr(request.app.state, "prediction_logger", None)
     uptime = time.time() - _start_time
     return {
         "status": "ok",
         "uptime_s": round(uptime, 2),
         "model_loaded": bool(ms and ms.is_loaded),
         "version": "1.0.0",
+        "prediction_log": pl.stats() if pl else None,
     }
 
 
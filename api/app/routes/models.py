@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Request
-from app.schemas.model import ModelStatus, FeatureSpec
+from fastapi import APIRouter, Request, HTTPException
+from app.schemas.model import ModelStatus, FeatureSpec, DriftReport
 
 router = APIRouter()
 
@@ -28,3 +28,27 @@ async def model_reload(request: Request):
         return {"reloaded": False}
     await ms.load_models()
     return {"reloaded": True, "version": ms.version}
+
+
+@router.get("/scheduler")
+async def model_scheduler(request: Request):
+    """Per-lane concurrency and queue-wait metrics of the inference scheduler"""
+    ms = getattr(request.app.state, "model_service", None)
+    return ms.scheduler.stats() if ms else {}
+
+
+@router.get("/drift", response_model=DriftReport)
+async def model_drift(request: Request):
+    ms = getattr(request.app.state, "model_service", None)
+    if not ms or ms.drift_monitor is None:
+        raise HTTPException(status_code=503, detail="Drift monitor not enabled")
+    return DriftReport(**ms.drift_monitor.report())
+
+
+@router.post("/drift/reset")
+async def model_drift_reset(request: Request):
+    ms = getattr(request.app.state, "model_service", None)
+    if not ms or ms.drift_monitor is None:
+        return {"reset": False}
+    ms.drift_monitor.reset()
+    return {"reset": True}
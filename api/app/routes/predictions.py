@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Request, HTTPException
-from typing import List
+from fastapi import APIRouter, Request, HTTPException, Query
+from typing import Any, List, Optional
+import time
 
 from app.schemas.prediction import (
     Measurement,
@@ -7,12 +8,29 @@ from app.schemas.prediction import (
     Prediction,
     BatchPrediction,
     BinaryClassificationResponse,
+    ExplanationResponse,
+    BatchExplanationResponse,
 )
 from app.utils.config import settings
 
 router = APIRouter()
 
 
+def _log_prediction(request: Request, endpoint: str, payload: Any, result: Any, started: float):
+    """Hand the record to the prediction logger, if enabled (never blocks)"""
+    pl = getattr(request.app.state, "prediction_logger", None)
+    if pl is None:
+        return
+    ms = getattr(request.app.state, "model_service", None)
+    pl.log(
+        endpoint=endpoint,
+        input=payload,
+        output=result,
+        model_version=getattr(ms, "version", "unknown"),
+        latency_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
 @router.post("/binary-classification", response_model=BinaryClassificationResponse)
 async def predict_binary_classification(measurement: Measurement, request: Request):
     """
@@ -26,8 +44,10 @@ async def predict_binary_classification(measurement: Measurement, request: Reque
     if not ms or not ms.is_loaded:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
+    started = time.perf_counter()
     try:
         result = await ms.predict_binary_classification(measurement)
+        _log_prediction(request, "binary-classification", measurement, result, started)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -44,8 +64,10 @@ async def predict(measurement: Measurement, request: Request):
     if not ms or not ms.is_loaded:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
+    started = time.perf_counter()
     try:
         result = await ms.predict_one(measurement)
+        _log_prediction(request, "predict", measurement, result, started)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -53,17 +75,73 @@ async def predict(measurement: Measurement, request: Request):
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
 
-@router.post("/predict/batch")
+@router.post("/predict/batch", response_model=BatchPrediction)
 async def predict_batch(payload: BatchMeasurement, request: Request):
     """
-    Endpoint batch multi-label em construção.
+    Predição multi-label em lote. Roda na fila de baixa prioridade (bulk), em fatias,
+    para não atrasar as predições individuais.
     """
-    return {
-        "message": "Endpoint batch em construção",
-        "detail": "Este endpoint está sendo desenvolvido.",
-        "status": "under_construction",
-        "received_measurements": len(payload.measurements)
-    }
+    ms = getattr(request.app.state, "model_service", None)
+    if not ms or not ms.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    started = time.perf_counter()
+    try:
+        result = await ms.predict_batch(payload)
+        _log_prediction(request, "predict/batch", payload.measurements, result.predictions, started)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
+
+@router.post("/explain", response_model=ExplanationResponse)
+async def explain(
+    measurement: Measurement,
+    request: Request,
+    top_n: Optional[int] = Query(None, ge=1, description="Keep only the N largest contributions"),
+):
+    """
+    Contribuição de cada campo da medição para a predição binária e para cada tipo de falha.
+    """
+    ms = getattr(request.app.state, "model_service", None)
+    if not ms or not ms.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    try:
+        return await ms.explain_one(measurement, top_n=top_n)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
+
+@router.post("/explain/batch", response_model=BatchExplanationResponse)
+async def explain_batch(
+    payload: BatchMeasurement,
+    request: Request,
+    top_n: Optional[int] = Query(None, ge=1, description="Keep only the N largest contributions"),
+):
+    """
+    Explicações em lote, calculadas em uma única chamada vetorizada por modelo.
+    """
+    ms = getattr(request.app.state, "model_service", None)
+    if not ms or not ms.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    try:
+        explanations = await ms.explain_batch(payload.measurements, top_n=top_n)
+        return BatchExplanationResponse(explanations=explanations)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
 
 @router.get("/example")
 async def example_payload():
@@ -16,3 +16,26 @@ class FeatureSpec(BaseModel):
     min: Optional[float] = None
     max: Optional[float] = None
     allowed_values: Optional[list[str]] = None
+
+
+class FeatureDrift(BaseModel):
+    name: str
+    count: int
+    out_of_range: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    frequencies: Optional[dict[str, float]] = None
+    psi: Optional[float] = None
+    ks: Optional[float] = None
+    # None until the monitor is ready (reference loaded and min_rows observed)
+    drifted: Optional[bool] = None
+
+
+class DriftReport(BaseModel):
+    ready: bool
+    min_rows: int
+    reference_loaded: bool
+    reference_rows: Optional[int] = None
+    rows_observed: int
+    psi_threshold: float
+    features: list[FeatureDrift]
@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from pydantic import BaseModel, Field
 from app.schemas.common import Tipo, FailureType, RiskLevel
 
@@ -48,3 +48,21 @@ class BatchSummary(BaseModel):
 class BatchPrediction(BaseModel):
     predictions: List[Prediction]
     summary: BatchSummary
+
+
+class Explanation(BaseModel):
+    """Per-field contributions of one model output, ordered by absolute value"""
+    base_value: float
+    output_space: Literal["log_odds", "probability"]
+    contributions: Dict[str, float]
+
+
+class ExplanationResponse(BaseModel):
+    binary: Optional[Explanation] = None
+    failure_types: Dict[FailureType, Explanation] = Field(default_factory=dict)
+    id: Optional[str | int] = None
+    id_produto: Optional[str] = None
+
+
+class BatchExplanationResponse(BaseModel):
+    explanations: List[ExplanationResponse]
@@ -0,0 +1,213 @@
+"""
+Streaming input-drift monitor.
+
+Keeps constant-memory sketches of the live inputs: a fixed-bin histogram per
+numeric feature (bins taken from the training reference profile), running
+mean/variance, `tipo` frequencies and out-of-range counts from the feature
+specs. Each observed row costs O(1) (a bisect over ~10 bin edges per
+feature); PSI and KS-style scores are computed from the bin counts when the
+report is requested.
+
+The reference profile is a JSON file saved next to the model artifacts by
+`app.pipelines.train` (see `build_reference_profile`; `--target profile`
+builds it without training). The monitor is ready once the profile is
+loaded and at least `min_rows` live rows were observed; until then PSI/KS
+(when available) are reported but `drifted` is None, since a handful of
+rows says nothing about the distribution.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.schemas.model import FeatureSpec
+
+REFERENCE_PROFILE_FILE = "reference_profile.json"
+
+# Floor for empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+
+def build_reference_profile(df, numeric_features: List[str], categorical_feature: str = "tipo",
+                            n_bins: int = 10) -> dict:
+    """Quantile-binned histograms of the training data, used as drift reference."""
+    import numpy as np
+
+    profile = {"n_rows": int(len(df)), "features": {}, "categories": {}}
+    for col in numeric_features:
+        values = df[col].dropna().to_numpy(dtype=float)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])).tolist()
+        # side="left" matches bisect_left used on the live data
+        counts = np.bincount(np.searchsorted(edges, values, side="left"), minlength=len(edges) + 1)
+        profile["features"][col] = {
+            "edges": edges,
+            "proportions": (counts / max(len(values), 1)).tolist(),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+        }
+    if categorical_feature in df.columns:
+        profile["categories"][categorical_feature] = {
+            str(k): float(v) for k, v in df[categorical_feature].value_counts(normalize=True).items()
+        }
+    return profile
+
+
+def psi(expected: List[float], actual: List[float]) -> float:
+    """Population Stability Index between two binned distributions."""
+    total = 0.0
+    for e, a in zip(expected, actual):
+        e, a = max(e, _EPSILON), max(a, _EPSILON)
+        total += (a - e) * math.log(a / e)
+    return total
+
+
+def ks_binned(expected: List[float], actual: List[float]) -> float:
+    """Max distance between the two CDFs evaluated at the bin edges."""
+    cdf_e = cdf_a = distance = 0.0
+    for e, a in zip(expected, actual):
+        cdf_e += e
+        cdf_a += a
+        distance = max(distance, abs(cdf_e - cdf_a))
+    return distance
+
+
+class _NumericSketch:
+    __slots__ = ("edges", "counts", "n", "mean", "m2", "out_of_range", "min", "max")
+
+    def __init__(self, edges: List[float], spec: FeatureSpec):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.out_of_range = 0
+        self.min = spec.min
+        self.max = spec.max
+
+    def update(self, value: float):
+        self.counts[bisect_left(self.edges, value)] += 1
+        # Welford running mean / variance
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        if (self.min is not None and value < self.min) or (self.max is not None and value > self.max):
+            self.out_of_range += 1
+
+
+class _CategoricalSketch:
+    __slots__ = ("counts", "n", "out_of_range", "allowed")
+
+    def __init__(self, spec: FeatureSpec):
+        self.counts: Dict[str, int] = {}
+        self.n = 0
+        self.out_of_range = 0
+        self.allowed = set(spec.allowed_values or [])
+
+    def update(self, value: str):
+        self.counts[value] = self.counts.get(value, 0) + 1
+        self.n += 1
+        if self.allowed and value not in self.allowed:
+            self.out_of_range += 1
+
+
+class DriftMonitor:
+    def __init__(self, feature_specs: List[FeatureSpec], reference: Optional[dict] = None,
+                 psi_threshold: float = 0.2, min_rows: int = 500):
+        self.feature_specs = feature_specs
+        self.reference = reference
+        self.psi_threshold = psi_threshold
+        self.min_rows = min_rows
+        self.reset()
+
+    @classmethod
+    def from_model_dir(cls, model_dir: str, feature_specs: List[FeatureSpec], filename: str = REFERENCE_PROFILE_FILE,
+                       psi_threshold: float = 0.2, min_rows: int = 500) -> "DriftMonitor":
+        path = os.path.join(model_dir, filename)
+        reference = None
+        if os.path.exists(path):
+            with open(path) as f:
+                reference = json.load(f)
+            logger.info(f"Drift reference profile loaded from {path}")
+        else:
+            logger.warning(f"Drift reference profile not found: {path}")
+        return cls(feature_specs, reference=reference, psi_threshold=psi_threshold, min_rows=min_rows)
+
+    def reset(self):
+        ref_features = (self.reference or {}).get("features", {})
+        self.rows_observed = 0
+        self._numeric: Dict[str, _NumericSketch] = {}
+        self._categorical: Dict[str, _CategoricalSketch] = {}
+        for spec in self.feature_specs:
+            if spec.dtype == "enum":
+                self._categorical[spec.name] = _CategoricalSketch(spec)
+            else:
+                edges = ref_features.get(spec.name, {}).get("edges", [])
+                self._numeric[spec.name] = _NumericSketch(edges, spec)
+
+    def observe(self, measurements: Iterable):
+        """Update the sketches with Measurement objects, O(1) per row."""
+        for m in measurements:
+            self.rows_observed += 1
+            for name, sketch in self._numeric.items():
+                sketch.update(float(getattr(m, name)))
+            for name, sketch in self._categorical.items():
+                value = getattr(m, name)
+                sketch.update(getattr(value, "value", str(value)))
+
+    def report(self) -> dict:
+        ref_features = (self.reference or {}).get("features", {})
+        ref_categories = (self.reference or {}).get("categories", {})
+        features = []
+
+        for name, sketch in self._numeric.items():
+            item = {
+                "name": name,
+                "count": sketch.n,
+                "out_of_range": sketch.out_of_range,
+                "mean": sketch.mean if sketch.n else None,
+                "std": math.sqrt(sketch.m2 / sketch.n) if sketch.n else None,
+            }
+            ref = ref_features.get(name)
+            if ref and sketch.n:
+                actual = [c / sketch.n for c in sketch.counts]
+                item["psi"] = psi(ref["proportions"], actual)
+                item["ks"] = ks_binned(ref["proportions"], actual)
+            features.append(item)
+
+        for name, sketch in self._categorical.items():
+            frequencies = {k: c / sketch.n for k, c in sketch.counts.items()} if sketch.n else {}
+            item = {
+                "name": name,
+                "count": sketch.n,
+                "out_of_range": sketch.out_of_range,
+                "frequencies": frequencies,
+            }
+            ref = ref_categories.get(name)
+            if ref and sketch.n:
+                categories = sorted(set(ref) | set(frequencies))
+                expected = [ref.get(c, 0.0) for c in categories]
+                actual = [frequencies.get(c, 0.0) for c in categories]
+                item["psi"] = psi(expected, actual)
+                item["ks"] = max(abs(e - a) for e, a in zip(expected, actual))
+            features.append(item)
+
+        ready = self.reference is not None and self.rows_observed >= self.min_rows
+        for item in features:
+            item["drifted"] = item["psi"] >= self.psi_threshold if ready and item.get("psi") is not None else None
+
+        return {
+            "ready": ready,
+            "min_rows": self.min_rows,
+            "reference_loaded": self.reference is not None,
+            "reference_rows": (self.reference or {}).get("n_rows"),
+            "rows_observed": self.rows_observed,
+            "psi_threshold": self.psi_threshold,
+            "features": features,
+        }
@@ -0,0 +1,150 @@
+"""
+Per-feature contributions for the tree-based models.
+
+XGBoost models use the booster's native tree-path contributions
+(`pred_contribs=True`, log-odds space). Scikit-learn trees/forests use the
+equivalent path decomposition computed from `decision_path` (probability
+space), and gradient boosting sums it over its regression trees (log-odds
+space). All run as a single vectorized call for the whole batch. Other
+estimators raise `NotImplementedError`.
+
+Contributions are computed on the preprocessed features and then summed
+back into the original `Measurement` fields (one-hot columns add up to
+`tipo`, scaled columns map 1:1 to their source field).
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+# Derived model features, attributed evenly to the fields they are computed from
+DERIVED_FEATURES = {
+    "sensor_ok": ["temperatura_ar", "temperatura_processo"],
+}
+
+
+def _xgboost_contributions(model, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    best_iteration = getattr(model, "best_iteration", None)
+    iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+    dmatrix = xgb.DMatrix(X, feature_names=booster.feature_names)
+    contribs = booster.predict(dmatrix, pred_contribs=True, iteration_range=iteration_range)
+    # Last column is the bias term
+    return contribs[:, :-1], contribs[:, -1]
+
+
+def _path_contributions(tree, X: np.ndarray, node_value: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Path decomposition of a fitted sklearn decision tree: every edge
+    parent -> child adds value(child) - value(parent) to the parent's split
+    feature, so contributions = decision_path(X) @ edge_deltas.
+    """
+    t = tree.tree_
+    parent = np.full(t.node_count, -1)
+    internal = np.flatnonzero(t.children_left >= 0)
+    parent[t.children_left[internal]] = internal
+    parent[t.children_right[internal]] = internal
+
+    children = np.flatnonzero(parent >= 0)
+    deltas = sparse.csr_matrix(
+        (node_value[children] - node_value[parent[children]], (children, t.feature[parent[children]])),
+        shape=(t.node_count, tree.n_features_in_),
+    )
+    contribs = (tree.decision_path(X) @ deltas).toarray()
+    return contribs, np.full(len(X), node_value[0])
+
+
+def _sklearn_tree_contributions(tree, X: np.ndarray, positive_class: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    values = tree.tree_.value[:, 0, :]
+    values = values / values.sum(axis=1, keepdims=True)
+    node_value = values[:, positive_class] if values.shape[1] > positive_class else np.zeros(len(values))
+    return _path_contributions(tree, X, node_value)
+
+
+def _gradient_boosting_contributions(model: GradientBoostingClassifier, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Learning-rate weighted sum of the regression trees' path contributions."""
+    if model.estimators_.shape[1] != 1:
+        raise NotImplementedError("Explanations not supported for multiclass gradient boosting")
+    contribs = np.zeros((len(X), model.n_features_in_))
+    for tree in model.estimators_[:, 0]:
+        contribs += model.learning_rate * _path_contributions(tree, X, tree.tree_.value[:, 0, 0])[0]
+    # The init estimator's log-odds, whatever it is, is the remainder
+    base = model.decision_function(X) - contribs.sum(axis=1)
+    return contribs, base
+
+
+def tree_contributions(estimator, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, str]:
+    """
+    Returns (contributions [n_samples, n_features], base values [n_samples], output space).
+    """
+    if hasattr(estimator, "get_booster"):
+        contribs, base = _xgboost_contributions(estimator, X)
+        return contribs, base, "log_odds"
+
+    if isinstance(estimator, GradientBoostingClassifier):
+        contribs, base = _gradient_boosting_contributions(estimator, X)
+        return contribs, base, "log_odds"
+
+    if hasattr(estimator, "tree_"):
+        positive = int(np.flatnonzero(estimator.classes_ == 1)[0]) if 1 in estimator.classes_ else 1
+        contribs, base = _sklearn_tree_contributions(estimator, X, positive)
+        return contribs, base, "probability"
+
+    if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier)):
+        # Plain average of the member trees (not valid for weighted ensembles like AdaBoost)
+        parts = [tree_contributions(e, X) for e in estimator.estimators_]
+        contribs = np.mean([p[0] for p in parts], axis=0)
+        base = np.mean([p[1] for p in parts], axis=0)
+        return contribs, base, "probability"
+
+    raise NotImplementedError(f"Explanations not supported for {type(estimator).__name__}")
+
+
+def field_mapping(feature_names: List[str], fields: List[str]) -> np.ndarray:
+    """
+    Matrix [n_features, n_fields] that sums preprocessed-feature
+    contributions back into the original fields.
+    """
+    mapping = np.zeros((len(feature_names), len(fields)))
+    index = {field: i for i, field in enumerate(fields)}
+
+    for row, name in enumerate(feature_names):
+        name = name.split("__", 1)[-1]  # ColumnTransformer prefixes (num__, cat__)
+        if name in index:
+            mapping[row, index[name]] = 1.0
+        elif name in DERIVED_FEATURES:
+            sources = [s for s in DERIVED_FEATURES[name] if s in index]
+            for source in sources:
+                mapping[row, index[source]] = 1.0 / len(sources)
+        else:
+            # One-hot columns: <field>_<category>
+            for field in fields:
+                if name.startswith(f"{field}_"):
+                    mapping[row, index[field]] = 1.0
+                    break
+    return mapping
+
+
+def transform_features(preprocessor, X: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """Run the preprocessing steps and return a dense matrix with its column names."""
+    transformed = preprocessor.transform(X)
+    if isinstance(transformed, pd.DataFrame):
+        return transformed.to_numpy(dtype=float), transformed.columns.tolist()
+    if sparse.issparse(transformed):
+        transformed = transformed.toarray()
+    return np.asarray(transformed, dtype=float), list(preprocessor.get_feature_names_out())
+
+
+def top_contributions(row: np.ndarray, fields: List[str], top_n: Optional[int] = None) -> Dict[str, float]:
+    """Field -> contribution, ordered by absolute value and optionally truncated."""
+    order = np.argsort(-np.abs(row), kind="stable")
+    if top_n is not None:
+        order = order[:top_n]
+    return {fields[i]: float(row[i]) for i in order}
@@ -18,13 +18,22 @@ from app.schemas.prediction import (
     BatchPrediction,
     BatchSummary,
     BinaryClassificationResponse,
+    Explanation,
+    ExplanationResponse,
 )
+from app.services import explainer
+from app.services.drift_monitor import DriftMonitor
+from app.services.scheduler import InferenceScheduler, INTERACTIVE, BULK
 from app.schemas.common import FailureType, RiskLevel
 from app.schemas.model import FeatureSpec
 from app.utils.config import Settings
 from app.utils.custom_transformers import DropColumns, OneHotEncoding, ScaleFeatures
+from app.utils.features import sensor_range_ok
 sys.modules['__main__'] = custom_transformers  # ajuste '__main__' para o módulo que aparece no erro
 
+# Order of the multilabel model outputs
+FAILURE_TYPES = [FailureType.FDF, FailureType.FDC, FailureType.FP, FailureType.FTE, FailureType.FA]
+
 
 class ModelService:
     def __init__(self, settings: Settings):
@@ -38,6 +47,10 @@ class ModelService:
         self._model = None
         self._binary_model = None
         self._multilabel_model = None
+        self.drift_monitor: Optional[DriftMonitor] = None
+        # Models already reported as unexplainable, so the warning is logged once per load
+        self._unexplainable: set = set()
+        self.scheduler = InferenceScheduler(settings)
 
     async def load_models(self):
         """Load the binary classification pipeline from disk"""
@@ -64,6 +77,17 @@ class ModelService:
                 logger.warning(f"Model file not found: {multilabel_model_path}")
                 self._multilabel_model = None
                 
+            if self.settings.DRIFT_MONITOR_ENABLED:
+                # New models come with a new reference profile, so the sketches restart
+                self.drift_monitor = DriftMonitor.from_model_dir(
+                    self.settings.MODEL_DIR,
+                    self.get_feature_specs(),
+                    filename=self.settings.DRIFT_REFERENCE_FILE,
+                    psi_threshold=self.settings.DRIFT_PSI_THRESHOLD,
+                    min_rows=self.settings.DRIFT_MIN_ROWS,
+                )
+
+            self._unexplainable = set()
             self.is_loaded = True
             self.trained_on = datetime.utcnow().strftime("%Y-%m-%d")
             logger.info("Models loaded successfully")
@@ -73,94 +97,116 @@ class ModelService:
             self.is_loaded = False
             raise
 
-    async def predict_binary_classification(self, m: Measurement) -> BinaryClassificationResponse:
-        """Predict machine failure using binary classification model"""
-        if not self.is_loaded or self._binary_model is None:
-            raise ValueError("Binary classification model not loaded")
-        
-        # Calculate sensor_ok based on temperature values
-        sensor_ok = m.temperatura_ar > 0 and m.temperatura_processo > 0
-        
-        # Prepare data for the model
-        data = pd.DataFrame({
-            'tipo': [m.tipo],
-            'temperatura_ar': [m.temperatura_ar],
-            'temperatura_processo': [m.temperatura_processo],
-            'umidade_relativa': [m.umidade_relativa],
-            'velocidade_rotacional': [m.velocidade_rotacional],
-            'torque': [m.torque],
-            'desgaste_da_ferramenta': [m.desgaste_da_ferramenta],
-            'sensor_ok': [sensor_ok]
+    @staticmethod
+    def _multilabel_frame(measurements: List[Measurement]) -> pd.DataFrame:
+        """Input frame for the multilabel pipeline (ids are dropped by the preprocessor)"""
+        return pd.DataFrame({
+            'id': [m.id for m in measurements],
+            'id_produto': [m.id_produto for m in measurements],
+            'tipo': [m.tipo for m in measurements],
+            'temperatura_ar': [m.temperatura_ar for m in measurements],
+            'temperatura_processo': [m.temperatura_processo for m in measurements],
+            'umidade_relativa': [m.umidade_relativa for m in measurements],
+            'velocidade_rotacional': [m.velocidade_rotacional for m in measurements],
+            'torque': [m.torque for m in measurements],
+            'desgaste_da_ferramenta': [m.desgaste_da_ferramenta for m in measurements],
         })
-        
+
+    @classmethod
+    def _binary_frame(cls, measurements: List[Measurement]) -> pd.DataFrame:
+        """Input frame for the binary pipeline"""
+        data = cls._multilabel_frame(measurements).drop(columns=['id', 'id_produto'])
+        # Same fixed rules as the cleaning stage; its outlier check needs the training
+        # statistics and is not applied here
+        data['sensor_ok'] = sensor_range_ok(data)
+        return data
+
+    def _observe(self, measurements: List[Measurement]):
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(measurements)
+
+    def _predict_binary_rows(self, measurements: List[Measurement]) -> List[BinaryClassificationResponse]:
+        """Vectorized binary prediction (runs in a scheduler worker thread)"""
+        data = self._binary_frame(measurements)
+
         # Get prediction and probabilities
         classifier = self._binary_model.get('pipeline')
-        prediction = classifier.predict(data)[0]
-        probabilities = classifier.predict_proba(data)[0]
-
-        return BinaryClassificationResponse(
-            falha_maquina=bool(prediction),
-            probabilidade_falha=float(probabilities[1]),  # Probability of failure (class 1)
-            probabilidade_sem_falha=float(probabilities[0]),  # Probability of no failure (class 0)
-            id=m.id,
-            id_produto=m.id_produto
-        )
+        predictions = classifier.predict(data)
+        probabilities = classifier.predict_proba(data)
 
-    async def predict_one(self, m: Measurement) -> Prediction:
-        """Predict machine failure using multilabel classification model"""
-        if not self.is_loaded or self._multilabel_model is None:
-            raise ValueError("Multilabel classification model not loaded")
+        return [
+            BinaryClassificationResponse(
+                falha_maquina=bool(predictions[i]),
+                probabilidade_falha=float(probabilities[i, 1]),  # Probability of failure (class 1)
+                probabilidade_sem_falha=float(probabilities[i, 0]),  # Probability of no failure (class 0)
+                id=m.id,
+                id_produto=m.id_produto,
+            )
+            for i, m in enumerate(measurements)
+        ]
 
-        # Prepare data for the model
-        data = pd.DataFrame({
-            'id': [m.id],
-            'id_produto': [m.id_produto],
-            'tipo': [m.tipo],
-            'temperatura_ar': [m.temperatura_ar],
-            'temperatura_processo': [m.temperatura_processo],
-            'umidade_relativa': [m.umidade_relativa],
-            'velocidade_rotacional': [m.velocidade_rotacional],
-            'torque': [m.torque],
-            'desgaste_da_ferramenta': [m.desgaste_da_ferramenta],
-        })
+    def _predict_multilabel_rows(self, measurements: List[Measurement]) -> List[Prediction]:
+        """Vectorized multilabel prediction (runs in a scheduler worker thread)"""
+        data = self._multilabel_frame(measurements)
 
-        # Get prediction probabilities
+        # Get prediction probabilities, one [n_rows, 2] array per failure type
         probabilities_list = self._multilabel_model.predict_proba(data)
 
-        failure_types = [FailureType.FDF, FailureType.FDC, FailureType.FP, FailureType.FTE, FailureType.FA]
-        
-        probs: Dict[FailureType, float] = {}
-        for i, failure_type in enumerate(failure_types):
-            probs[failure_type] = probabilities_list[i][0, 1]
+        preds: List[Prediction] = []
+        for row, m in enumerate(measurements):
+            probs: Dict[FailureType, float] = {}
+            for i, failure_type in enumerate(FAILURE_TYPES):
+                probs[failure_type] = float(probabilities_list[i][row, 1])
 
-        machine_failure_probability = max(probs.values())
-        will_fail = bool(machine_failure_probability >= self.threshold)
-        most_likely = max(probs, key=probs.get) if will_fail else None
+            machine_failure_probability = max(probs.values())
+            will_fail = bool(machine_failure_probability >= self.threshold)
+            most_likely = max(probs, key=probs.get) if will_fail else None
 
-        risk = (
-            RiskLevel.high if machine_failure_probability >= 0.7 
-            else RiskLevel.medium if machine_failure_probability >= 0.4 
-            else RiskLevel.low
-        )
+            risk = (
+                RiskLevel.high if machine_failure_probability >= 0.7
+                else RiskLevel.medium if machine_failure_probability >= 0.4
+                else RiskLevel.low
+            )
 
-        return Prediction(
-            will_fail=will_fail,
-            machine_failure_probability=machine_failure_probability,
-            failure_type_probs=probs,
-            most_likely_failure=most_likely,
-            risk_level=risk,
-            id=m.id,
-            id_produto=m.id_produto,
-        )
+            preds.append(Prediction(
+                will_fail=will_fail,
+                machine_failure_probability=machine_failure_probability,
+                failure_type_probs=probs,
+                most_likely_failure=most_likely,
+                risk_level=risk,
+                id=m.id,
+                id_produto=m.id_produto,
+            ))
+        return preds
+
+    async def predict_binary_classification(self, m: Measurement) -> BinaryClassificationResponse:
+        """Predict machine failure using binary classification model"""
+        if not self.is_loaded or self._binary_model is None:
+            raise ValueError("Binary classification model not loaded")
+
+        self._observe([m])
+        return (await self.scheduler.run(INTERACTIVE, self._predict_binary_rows, [m]))[0]
+
+    async def predict_one(self, m: Measurement) -> Prediction:
+        """Predict machine failure using multilabel classification model"""
+        if not self.is_loaded or self._multilabel_model is None:
+            raise ValueError("Multilabel classification model not loaded")
+
+        self._observe([m])
+        return (await self.scheduler.run(INTERACTIVE, self._predict_multilabel_rows, [m]))[0]
 
     async def predict_batch(self, payload: BatchMeasurement) -> BatchPrediction:
         if len(payload.measurements) > self.settings.MAX_BATCH_SIZE:
             # Raising exceptions is handled at route level; here we ensure sane behavior too
             raise ValueError("Batch too large")
+        if not self.is_loaded or self._multilabel_model is None:
+            raise ValueError("Multilabel classification model not loaded")
 
-        preds: List[Prediction] = []
-        for m in payload.measurements:
-            preds.append(await self.predict_one(m))
+        self._observe(payload.measurements)
+        # Bulk lane, in slices, so single predictions are served in between
+        preds: List[Prediction] = await self.scheduler.run_sliced(
+            self._predict_multilabel_rows, payload.measurements, lane=BULK
+        )
 
         # Summary
         if preds:
@@ -182,6 +228,80 @@ class ModelService:
             ),
         )
 
+    def _contributions(self, name: str, estimator, X):
+        """tree_contributions, or None (logged once) when the estimator is not supported"""
+        try:
+            return explainer.tree_contributions(estimator, X)
+        except NotImplementedError as e:
+            if name not in self._unexplainable:
+                self._unexplainable.add(name)
+                logger.warning(f"Skipping explanations for {name}: {e}")
+            return None
+
+    def _explain_rows(self, measurements: List[Measurement], top_n: Optional[int] = None) -> List[ExplanationResponse]:
+        """
+        Per-field contributions of the binary model and of each FailureType head.
+        Models that cannot be explained are left out of the response.
+        """
+        fields = [spec.name for spec in self.get_feature_specs()]
+        responses = [ExplanationResponse(id=m.id, id_produto=m.id_produto) for m in measurements]
+        explained = False
+
+        if self._binary_model is not None:
+            pipeline = self._binary_model.get('pipeline')
+            X, names = explainer.transform_features(pipeline.named_steps['preprocessor'], self._binary_frame(measurements))
+            result = self._contributions("binary", pipeline.named_steps['classifier'], X)
+            if result is not None:
+                explained = True
+                contribs, base, space = result
+                contribs = contribs @ explainer.field_mapping(names, fields)
+                for i, response in enumerate(responses):
+                    response.binary = Explanation(
+                        base_value=float(base[i]),
+                        output_space=space,
+                        contributions=explainer.top_contributions(contribs[i], fields, top_n),
+                    )
+
+        if self._multilabel_model is not None:
+            X, names = explainer.transform_features(
+                self._multilabel_model.named_steps['preprocessor'], self._multilabel_frame(measurements)
+            )
+            mapping = explainer.field_mapping(names, fields)
+            heads = self._multilabel_model.named_steps['model'].estimators_
+            for failure_type, head in zip(FAILURE_TYPES, heads):
+                result = self._contributions(f"multilabel {failure_type.value}", head, X)
+                if result is None:
+                    continue
+                explained = True
+                contribs, base, space = result
+                contribs = contribs @ mapping
+                for i, response in enumerate(responses):
+                    response.failure_types[failure_type] = Explanation(
+                        base_value=float(base[i]),
+                        output_space=space,
+                        contributions=explainer.top_contributions(contribs[i], fields, top_n),
+                    )
+
+        if not explained:
+            raise NotImplementedError("None of the loaded models supports explanations")
+        return responses
+
+    def _check_explainable(self):
+        if not self.is_loaded or (self._binary_model is None and self._multilabel_model is None):
+            raise ValueError("Models not loaded")
+
+    async def explain_batch(self, measurements: List[Measurement], top_n: Optional[int] = None) -> List[ExplanationResponse]:
+        self._check_explainable()
+        if len(measurements) > self.settings.MAX_BATCH_SIZE:
+            raise ValueError("Batch too large")
+        return await self.scheduler.run_sliced(
+            lambda rows: self._explain_rows(rows, top_n), measurements, lane=BULK
+        )
+
+    async def explain_one(self, m: Measurement, top_n: Optional[int] = None) -> ExplanationResponse:
+        self._check_explainable()
+        return (await self.scheduler.run(INTERACTIVE, self._explain_rows, [m], top_n))[0]
+
     def get_feature_specs(self) -> list[FeatureSpec]:
         return [
             FeatureSpec(name="tipo", dtype="enum", required=True, allowed_values=["L", "M", "H"]),
@@ -0,0 +1,193 @@
+"""
+Asynchronous prediction log sink.
+
+Routes call `PredictionLogger.log(...)`, which only puts the record on a
+bounded in-memory queue (never blocks; records are dropped and counted when
+the queue is full). A background task drains the queue in batches and writes
+them to rotating JSONL or SQLite files from a worker thread, flushing when a
+batch is full or when the flush interval elapses.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from app.utils.config import Settings
+
+
+class PredictionLogger:
+    def __init__(self, settings: Settings):
+        self.log_dir = settings.PREDICTION_LOG_DIR
+        self.format = settings.PREDICTION_LOG_FORMAT
+        self.batch_size = settings.PREDICTION_LOG_BATCH_SIZE
+        self.flush_interval = settings.PREDICTION_LOG_FLUSH_INTERVAL_S
+        self.max_file_bytes = settings.PREDICTION_LOG_MAX_FILE_MB * 1024 * 1024
+
+        if self.format not in ("jsonl", "sqlite"):
+            raise ValueError(f"Unsupported prediction log format: {self.format}")
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PREDICTION_LOG_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._current_path: Optional[str] = None
+
+        self.enqueued: int = 0
+        self.written: int = 0
+        self.dropped: int = 0
+        # Records of batches whose write failed (write_errors counts the batches)
+        self.lost: int = 0
+        self.write_errors: int = 0
+
+    def log(self, endpoint: str, input: Any, output: Any, model_version: str, latency_ms: float) -> bool:
+        """Enqueue one record. Serialization happens later, in the writer thread."""
+        record = (time.time(), endpoint, input, output, model_version, latency_ms)
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def start(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Prediction logger writing {self.format} files to {self.log_dir}")
+
+    async def stop(self):
+        """Flush everything still queued and stop the background task."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info(f"Prediction logger stopped ({self.stats()})")
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "lost": self.lost,
+            "write_errors": self.write_errors,
+            "queued": self._queue.qsize(),
+        }
+
+    def _drain(self, limit: int) -> List[tuple]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _wait_for_record(self, timeout: float) -> Optional[tuple]:
+        """Next queued record, or None on timeout / shutdown."""
+        get = asyncio.ensure_future(self._queue.get())
+        stop = asyncio.ensure_future(self._stopping.wait())
+        done, _ = await asyncio.wait({get, stop}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if get in done:
+            return get.result()
+        get.cancel()
+        return None
+
+    async def _next_batch(self) -> List[tuple]:
+        """Collect records until the batch is full or the flush interval elapses."""
+        batch: List[tuple] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stopping.is_set():
+            batch.extend(self._drain(self.batch_size - len(batch)))
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            record = await self._wait_for_record(remaining)
+            if record is None:
+                break
+            batch.append(record)
+        if self._stopping.is_set():
+            batch.extend(self._drain(self.batch_size - len(batch)))
+        return batch
+
+    async def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await asyncio.to_thread(self._write, batch)
+
+    @staticmethod
+    def _to_json(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return value.model_dump(mode="json")
+        if isinstance(value, list):
+            return [PredictionLogger._to_json(v) for v in value]
+        return value
+
+    @classmethod
+    def _records(cls, batch: List[tuple]) -> List[dict]:
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+                "endpoint": endpoint,
+                "model_version": model_version,
+                "latency_ms": round(latency_ms, 3),
+                "input": cls._to_json(input),
+                "output": cls._to_json(output),
+            }
+            for ts, endpoint, input, output, model_version, latency_ms in batch
+        ]
+
+    def _path(self) -> str:
+        """Current output file, rotated once it grows past the size limit."""
+        if (
+            self._current_path is None
+            or (os.path.exists(self._current_path) and os.path.getsize(self._current_path) >= self.max_file_bytes)
+        ):
+            suffix = "jsonl" if self.format == "jsonl" else "db"
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+            self._current_path = os.path.join(self.log_dir, f"predictions-{stamp}.{suffix}")
+        return self._current_path
+
+    def _write(self, batch: List[tuple]):
+        try:
+            records = self._records(batch)
+            path = self._path()
+            if self.format == "jsonl":
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+            else:
+                conn = sqlite3.connect(path)
+                try:
+                    with conn:
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS predictions ("
+                            "timestamp TEXT, endpoint TEXT, model_version TEXT, latency_ms REAL, "
+                            "input TEXT, output TEXT)"
+                        )
+                        conn.executemany(
+                            "INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)",
+                            [
+                                (r["timestamp"], r["endpoint"], r["model_version"], r["latency_ms"],
+                                 json.dumps(r["input"], ensure_ascii=False),
+                                 json.dumps(r["output"], ensure_ascii=False))
+                                for r in records
+                            ],
+                        )
+                finally:
+                    conn.close()
+            self.written += len(batch)
+        except Exception as e:
+            self.write_errors += 1
+            self.lost += len(batch)
+            logger.error(f"Error writing {len(batch)} prediction log records: {e}")
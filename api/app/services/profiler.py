@@ -0,0 +1,254 @@
+"""
+On-demand profiling of the inference path.
+
+A profiling session runs for a bounded window (and optionally stops early
+after N inference requests). While it runs:
+
+- a sampler thread reads `sys._current_frames()` every
+  `PROFILING_SAMPLE_INTERVAL_MS` and records the stacks of the inference
+  worker threads only, as collapsed stacks (flamegraph.pl / speedscope /
+  inferno format);
+- each inference job can also run under its own `cProfile.Profile`, merged
+  into a single pstats file (snakeviz, `python -m pstats`);
+- `tracemalloc` can be started and the allocation growth between the start
+  and the end of the window is reported, together with the traced-memory
+  peak.
+
+By default a session only runs the sampler. cProfile and tracemalloc are
+opt-in and cannot be combined: on the shipped models each alone makes a
+prediction ~4x slower, both together ~36x.
+
+Nothing here is created unless `PROFILING_ENABLED` is set, and the scheduler
+only wraps jobs while a session is running.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Set
+
+from loguru import logger
+
+from app.utils.config import Settings
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class ProfileSession:
+    def __init__(self, duration_s: float, max_requests: Optional[int], interval_s: float,
+                 deterministic: bool, trace_allocations: bool, tracemalloc_frames: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.duration_s = duration_s
+        self.max_requests = max_requests
+        self.interval_s = interval_s
+        self.deterministic = deterministic
+        self.trace_allocations = trace_allocations
+        self.tracemalloc_frames = tracemalloc_frames
+
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.requests = 0
+        self.jobs = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.stats = pstats.Stats()
+        self.skipped_pstats_jobs = 0
+        self.allocations: Optional[str] = None
+        self.traced_peak_bytes: Optional[int] = None
+
+        self._threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started_tracemalloc = False
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    def start(self):
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.tracemalloc_frames)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._start_snapshot = tracemalloc.take_snapshot()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def request_done(self):
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self._stop.set()
+
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Job wrapper that makes the worker thread visible to the sampler (and cProfile)."""
+        def profiled(*args):
+            ident = threading.get_ident()
+            with self._lock:
+                self._threads.add(ident)
+                self.jobs += 1
+            profile = cProfile.Profile() if self.deterministic else None
+            try:
+                if profile is not None:
+                    try:
+                        profile.enable()
+                    except ValueError:
+                        # Another profiler is active in this thread / interpreter
+                        profile = None
+                        with self._lock:
+                            self.skipped_pstats_jobs += 1
+                return fn(*args)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                with self._lock:
+                    self._threads.discard(ident)
+                    if profile is not None:
+                        self.stats.add(profile)
+        return profiled
+
+    def _sample(self):
+        with self._lock:
+            threads = set(self._threads)
+        if not threads:
+            return
+        for ident, frame in sys._current_frames().items():
+            if ident in threads:
+                self.stacks[_collapse(frame)] += 1
+                self.samples += 1
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration_s
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._sample()
+            self._stop.wait(self.interval_s)
+        self._finish()
+
+    def _finish(self):
+        end: Optional[tracemalloc.Snapshot] = None
+        try:
+            if self._start_snapshot is not None:
+                end = tracemalloc.take_snapshot()
+                _, self.traced_peak_bytes = tracemalloc.get_traced_memory()
+        except Exception as e:
+            logger.error(f"Error taking allocation snapshot for profile {self.id}: {e}")
+        finally:
+            # Stop tracing first: filtering and comparing snapshots is much slower while it runs
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        try:
+            if end is not None:
+                self._collect_allocations(end)
+        except Exception as e:
+            logger.error(f"Error collecting allocation snapshot for profile {self.id}: {e}")
+        finally:
+            self._start_snapshot = None
+            self.finished_at = datetime.now(timezone.utc)
+            logger.info(f"Profile {self.id} finished: {self.requests} requests, {self.samples} samples")
+
+    def _collect_allocations(self, end: tracemalloc.Snapshot):
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        diff = end.filter_traces(filters).compare_to(self._start_snapshot.filter_traces(filters), "traceback")
+        lines = [
+            f"Allocation growth during profile {self.id} "
+            f"(peak traced memory: {self.traced_peak_bytes / 1024 / 1024:.1f} MiB)",
+            "",
+        ]
+        for stat in diff[:50]:
+            lines.append(f"{stat.size_diff / 1024:+.1f} KiB, {stat.count_diff:+d} blocks "
+                         f"(now {stat.size / 1024:.1f} KiB)")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        self.allocations = "\n".join(lines) + "\n"
+
+    def collapsed_stacks(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def pstats_bytes(self) -> bytes:
+        # Same format as pstats.Stats.dump_stats
+        with self._lock:
+            return marshal.dumps(self.stats.stats)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "running": self.running,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_s": self.duration_s,
+            "max_requests": self.max_requests,
+            "requests": self.requests,
+            "jobs": self.jobs,
+            "samples": self.samples,
+            "sample_interval_ms": self.interval_s * 1000,
+            "deterministic": self.deterministic,
+            "trace_allocations": self.trace_allocations,
+            "skipped_pstats_jobs": self.skipped_pstats_jobs,
+            "traced_peak_bytes": self.traced_peak_bytes,
+        }
+
+
+class Profiler:
+    def __init__(self, settings: Settings):
+        self.max_duration_s = settings.PROFILING_MAX_DURATION_S
+        self.interval_s = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        self.tracemalloc_frames = settings.PROFILING_TRACEMALLOC_FRAMES
+        # Last session (running or finished), kept until the next one starts
+        self.session: Optional[ProfileSession] = None
+
+    @property
+    def active(self) -> Optional[ProfileSession]:
+        session = self.session
+        return session if session is not None and session.running else None
+
+    def start(self, duration_s: float, max_requests: Optional[int] = None,
+              deterministic: bool = False, trace_allocations: bool = False) -> ProfileSession:
+        if self.active is not None:
+            raise RuntimeError("A profiling session is already running")
+        if duration_s <= 0 or duration_s > self.max_duration_s:
+            raise ValueError(f"duration_s must be in (0, {self.max_duration_s}]")
+        if max_requests is not None and max_requests < 1:
+            raise ValueError("max_requests must be >= 1")
+        if deterministic and trace_allocations:
+            raise ValueError(
+                "deterministic and trace_allocations cannot be combined: together they make each "
+                "prediction ~36x slower (~4x each); capture them in separate sessions"
+            )
+        session = ProfileSession(duration_s, max_requests, self.interval_s, deterministic,
+                                 trace_allocations, self.tracemalloc_frames)
+        session.start()
+        self.session = session
+        logger.info(f"Profile {session.id} started (duration {duration_s}s, max_requests {max_requests})")
+        return session
+
+    def stop(self):
+        if self.active is not None:
+            self.session.stop()
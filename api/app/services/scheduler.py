@@ -0,0 +1,176 @@
+"""
+Priority lanes for model inference.
+
+Inference runs in a thread pool so the event loop (health checks, request
+parsing) is never blocked by model code. Work is split into two lanes:
+
+- `interactive`: single predictions from the dashboard / PLCs
+- `bulk`: batch, stream and other multi-row work
+
+Each lane has its own concurrency limit and its own reserved workers (the
+pool has exactly the sum of the limits), so the lanes are isolated: however
+much bulk work is queued, interactive jobs only ever wait for other
+interactive jobs.
+
+Within a lane, each request gets its own queue of jobs and the lane serves
+those queues round-robin, one job at a time. Bulk work is submitted as
+slices of `SCHEDULER_BULK_SLICE_SIZE` rows, so a small batch that arrives
+behind a large one waits for at most one slice per earlier request instead
+of for the whole earlier batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, TYPE_CHECKING
+
+from app.utils.config import Settings
+
+if TYPE_CHECKING:
+    from app.services.profiler import Profiler
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+LANES = [INTERACTIVE, BULK]
+
+
+class _LaneStats:
+    __slots__ = ("submitted", "completed", "failed", "wait_total_ms", "wait_max_ms", "last_wait_ms")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.last_wait_ms = 0.0
+
+    def record_wait(self, wait_ms: float):
+        self.wait_total_ms += wait_ms
+        self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+        self.last_wait_ms = wait_ms
+
+
+class InferenceScheduler:
+    def __init__(self, settings: Settings):
+        self.limits: Dict[str, int] = {
+            INTERACTIVE: settings.SCHEDULER_INTERACTIVE_CONCURRENCY,
+            BULK: settings.SCHEDULER_BULK_CONCURRENCY,
+        }
+        self.slice_size: int = settings.SCHEDULER_BULK_SLICE_SIZE
+        # One worker per lane slot, so bulk work can never starve interactive work
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(self.limits.values()), thread_name_prefix="inference"
+        )
+        # Per lane: round-robin of per-request job queues
+        self._waiting: Dict[str, Deque[Deque[tuple]]] = {lane: deque() for lane in LANES}
+        self._running: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+        # Set at startup when PROFILING_ENABLED; jobs are only wrapped while a session runs
+        self.profiler: Optional["Profiler"] = None
+
+    async def run(self, lane: str, fn: Callable[..., Any], *args) -> Any:
+        """Run `fn(*args)` in the given lane and return its result."""
+        future, = self._enqueue(lane, fn, [args])
+        try:
+            return await future
+        finally:
+            self._request_done()
+
+    async def run_sliced(self, fn: Callable[[Sequence], List[Any]], items: Sequence, lane: str = BULK) -> List[Any]:
+        """
+        Run `fn` over slices of `items` and concatenate the results. The slices
+        form one request queue, served round-robin with the other requests in
+        the lane. If a slice fails the remaining ones are cancelled.
+        """
+        slices = [items[i:i + self.slice_size] for i in range(0, len(items), self.slice_size)]
+        futures = self._enqueue(lane, fn, [(s,) for s in slices])
+        try:
+            results = await asyncio.gather(*futures)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            self._request_done()
+        return [item for result in results for item in result]
+
+    def _request_done(self):
+        session = self.profiler.active if self.profiler is not None else None
+        if session is not None:
+            session.request_done()
+
+    def _enqueue(self, lane: str, fn: Callable[..., Any], args_list: List[tuple]) -> List[asyncio.Future]:
+        """Queue the jobs of one request; returns one future per job."""
+        if lane not in self._waiting:
+            raise ValueError(f"Unknown scheduling lane: {lane}")
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        jobs = deque((loop.create_future(), fn, args, now) for args in args_list)
+        futures = [job[0] for job in jobs]
+        if jobs:
+            self._waiting[lane].append(jobs)
+            self._stats[lane].submitted += len(jobs)
+            self._dispatch()
+        return futures
+
+    def _dispatch(self):
+        for lane in LANES:
+            waiting = self._waiting[lane]
+            while waiting and self._running[lane] < self.limits[lane]:
+                jobs = waiting.popleft()
+                future, fn, args, enqueued = jobs.popleft()
+                if jobs:
+                    # Back of the line: the other requests get the next turns
+                    waiting.append(jobs)
+                if future.cancelled():
+                    continue
+                self._stats[lane].record_wait((time.perf_counter() - enqueued) * 1000)
+                self._running[lane] += 1
+                session = self.profiler.active if self.profiler is not None else None
+                if session is not None:
+                    fn = session.wrap(fn)
+                task = asyncio.wrap_future(self._executor.submit(fn, *args))
+                task.add_done_callback(lambda t, lane=lane, future=future: self._on_done(lane, future, t))
+
+    def _on_done(self, lane: str, future: asyncio.Future, task: asyncio.Future):
+        self._running[lane] -= 1
+        stats = self._stats[lane]
+        if task.cancelled():
+            stats.failed += 1
+            future.cancel()
+        elif task.exception() is not None:
+            stats.failed += 1
+            if not future.done():
+                future.set_exception(task.exception())
+        else:
+            stats.completed += 1
+            if not future.done():
+                future.set_result(task.result())
+        self._dispatch()
+
+    def stats(self) -> dict:
+        result = {}
+        for lane in LANES:
+            s = self._stats[lane]
+            dispatched = s.completed + s.failed + self._running[lane]
+            result[lane] = {
+                "concurrency_limit": self.limits[lane],
+                "running": self._running[lane],
+                "queued": sum(len(jobs) for jobs in self._waiting[lane]),
+                "submitted": s.submitted,
+                "completed": s.completed,
+                "failed": s.failed,
+                "avg_queue_wait_ms": round(s.wait_total_ms / dispatched, 3) if dispatched else 0.0,
+                "max_queue_wait_ms": round(s.wait_max_ms, 3),
+                "last_queue_wait_ms": round(s.last_wait_ms, 3),
+            }
+        result["bulk_slice_size"] = self.slice_size
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
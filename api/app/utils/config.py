@@ -1,3 +1,4 @@
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +13,33 @@ class Settings(BaseSettings):
     PREDICTION_THRESHOLD: float = 0.5
     MAX_BATCH_SIZE: int = 1000
 
+    # Inference scheduling lanes
+    SCHEDULER_INTERACTIVE_CONCURRENCY: int = Field(2, ge=1)
+    SCHEDULER_BULK_CONCURRENCY: int = Field(1, ge=1)
+    SCHEDULER_BULK_SLICE_SIZE: int = Field(100, ge=1)
+
+    # Input drift monitor
+    DRIFT_MONITOR_ENABLED: bool = True
+    DRIFT_REFERENCE_FILE: str = "reference_profile.json"
+    DRIFT_PSI_THRESHOLD: float = 0.2
+    DRIFT_MIN_ROWS: int = Field(500, ge=1)
+
+    # On-demand profiling (/debug/profile); the router is only mounted when enabled
+    PROFILING_ENABLED: bool = False
+    PROFILING_ADMIN_TOKEN: str = ""
+    PROFILING_MAX_DURATION_S: float = 120.0
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_TRACEMALLOC_FRAMES: int = 15
+
+    # Prediction log (asynchronous, batched)
+    PREDICTION_LOG_ENABLED: bool = False
+    PREDICTION_LOG_DIR: str = "logs/predictions"
+    PREDICTION_LOG_FORMAT: str = "jsonl"  # jsonl | sqlite
+    PREDICTION_LOG_QUEUE_SIZE: int = 10000
+    PREDICTION_LOG_BATCH_SIZE: int = 500
+    PREDICTION_LOG_FLUSH_INTERVAL_S: float = 5.0
+    PREDICTION_LOG_MAX_FILE_MB: int = 50
+
     model_config = SettingsConfigDict(env_file="api/.env", env_file_encoding="utf-8", extra="ignore")
 
 
@@ -0,0 +1,48 @@
+"""
+Dataset columns and sensor validity rules shared by the cleaning stage, the
+training pipeline and the API. Kept free of heavy imports (only pandas).
+"""
+
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+# Failure labels, in the same order as FailureType / model_service
+LABELS = ["fdf", "fdc", "fp", "fte", "fa"]
+
+DROP_COLUMNS = ["id", "id_produto"]
+CATEGORICAL_FEATURES = ["tipo"]
+NUMERIC_FEATURES = [
+    "temperatura_ar",
+    "temperatura_processo",
+    "umidade_relativa",
+    "velocidade_rotacional",
+    "torque",
+    "desgaste_da_ferramenta",
+]
+BINARY_FEATURES = ["tipo", *NUMERIC_FEATURES, "sensor_ok"]
+
+TEMPERATURE_COLUMNS = ["temperatura_ar", "temperatura_processo"]
+
+# Valid sensor ranges (Kelvin), same bounds as ModelService.get_feature_specs
+TEMPERATURE_RANGES: Dict[str, Tuple[float, float]] = {
+    "temperatura_ar": (200, 400),
+    "temperatura_processo": (200, 500),
+}
+
+# Process temperature should not be far below the air temperature
+MAX_PROCESS_BELOW_AIR = 10
+
+
+def sensor_range_ok(X: pd.DataFrame, temp_ranges: Optional[Dict[str, Tuple[float, float]]] = None) -> pd.Series:
+    """
+    Per-row check of the fixed sensor rules (temperature ranges and the
+    process/air relation). Missing values pass here; the cleaning stage
+    checks them, and the outliers, separately.
+    """
+    ok = pd.Series(True, index=X.index)
+    for col, (min_val, max_val) in (temp_ranges or TEMPERATURE_RANGES).items():
+        if col in X.columns:
+            ok &= X[col].between(min_val, max_val) | X[col].isna()
+    ok &= ~(X["temperatura_processo"] < X["temperatura_ar"] - MAX_PROCESS_BELOW_AIR)
+    return ok
@@ -9,8 +9,10 @@ from contextlib import asynccontextmanager
 import uvicorn
 from loguru import logger
 
-from app.routes import health, predictions, models
+from app.routes import health, predictions, models, debug
 from app.services.model_service import ModelService
+from app.services.prediction_logger import PredictionLogger
+from app.services.profiler import Profiler
 from app.utils.config import settings
 
 
@@ -30,10 +32,29 @@ async def lifespan(app: FastAPI):
     app.state.model_service = model_service
     logger.info("Models loaded successfully")
 
+    prediction_logger = None
+    if settings.PREDICTION_LOG_ENABLED:
+        prediction_logger = PredictionLogger(settings=settings)
+        await prediction_logger.start()
+    app.state.prediction_logger = prediction_logger
+
+    profiler = None
+    if settings.PROFILING_ENABLED:
+        if not settings.PROFILING_ADMIN_TOKEN:
+            logger.warning("PROFILING_ENABLED without PROFILING_ADMIN_TOKEN: /debug/profile will reject all requests")
+        profiler = Profiler(settings=settings)
+        model_service.scheduler.profiler = profiler
+    app.state.profiler = profiler
+
     yield
 
     # Shutdown
     logger.info("Shutting down Predictive Maintenance API...")
+    if prediction_logger is not None:
+        await prediction_logger.stop()
+    if profiler is not None:
+        profiler.stop()
+    model_service.scheduler.shutdown()
 
 
 # Create FastAPI app with lifespan management
@@ -67,6 +88,8 @@ app.add_middleware(
 app.include_router(health.router, prefix="/health", tags=["Health"])
 app.include_router(predictions.router, prefix="/predictions", tags=["Predictions"])
 app.include_router(models.router, prefix="/models", tags=["Models"])
+if settings.PROFILING_ENABLED:
+    app.include_router(debug.router, prefix="/debug", tags=["Debug"])
 
 
 @app.get("/", include_in_schema=False)